@@ -99,7 +99,7 @@ The argument ``existing`` defines the update strategy and can ``Existing.KEEP``
 'OVERWRITTEN'
 """
 import difflib
-import filecmp
+import os
 import tempfile
 from enum import Enum
 from os import fdopen as _fdopen
@@ -109,6 +109,8 @@ from typing import Union
 
 __all__ = ["Existing", "State", "open_", "OutputFile"]
 
+_BUFSIZE = 64 * 1024
+
 
 class Existing(Enum):
 
@@ -314,9 +316,22 @@ class OutputFile:
 
 
 def _is_modified(path0, path1):
-    if not path0.exists() or not path1.exists():
+    try:
+        size0 = os.stat(path0).st_size
+        size1 = os.stat(path1).st_size
+    except FileNotFoundError:
         return None
-    return not filecmp.cmp(path0, path1, shallow=False)
+    # Files of different size cannot be identical - skip reading them at all.
+    if size0 != size1:
+        return True
+    with open(path0, "rb") as handle0:
+        with open(path1, "rb") as handle1:
+            while True:
+                chunk0 = handle0.read(_BUFSIZE)
+                if chunk0 != handle1.read(_BUFSIZE):
+                    return True
+                if not chunk0:
+                    return False
 
 
 def _get_diff(filepath0, filepath1):
@@ -23,41 +23,102 @@
 #
 """Testing."""
 
+import os
 import re
-import time
+import shutil
 
-from pytest import approx, fixture, mark, raises
+from pytest import fixture, mark, raises
 
 from outputfile import Existing, State, open_
 
-from .util import chdir
+from .util import age_file, chdir, read_all
 
-SLEEP = 0.2
 WORLD = """
 Hello World.
 """
 MARS = """
 Hello Mars.
 """
+# On-disk content, as written by text mode
+WORLD_B = WORLD.replace("\n", os.linesep).encode()
+MARS_B = MARS.replace("\n", os.linesep).encode()
+_CREATED, _IDENTICAL, _UPDATED, _OPEN, _FAILED, _EXISTING, _OVERWRITTEN = (
+    State.CREATED,
+    State.IDENTICAL,
+    State.UPDATED,
+    State.OPEN,
+    State.FAILED,
+    State.EXISTING,
+    State.OVERWRITTEN,
+)
+_CLOSED_MSG = re.escape("I/O Error. Write on closed file.")
+_MKDIR_FMT = "Output directory '{}' does not exists."
 # pylint: disable=redefined-outer-name
 
 
+def write_file(filepath, text, **kwargs):
+    """Write ``text`` to ``filepath`` via :any:`open_` and return the closed file."""
+    with open_(filepath, **kwargs) as file:
+        file.write(text)
+    return file
+
+
+def check(file, state, filepath, content):
+    """Check ``file`` state and ``filepath`` ``content``."""
+    assert file.state is state
+    assert read_all(filepath) == content
+
+
 def cmp_mtime(mtime0, mtime1):
     """Compare Modification Times"""
     # Hack, to resolve floating round issue
-    return abs(mtime1 - mtime0) == approx(0)
+    return abs(mtime1 - mtime0) < 1e-6
+
+
+@fixture(scope="session")
+def basedir(tmp_path_factory):
+    """Temporary Directory Shared By All Tests."""
+    yield tmp_path_factory.mktemp("of", numbered=False)
+
+
+@fixture
+def nodename(request):
+    """Unique Filesystem Name Of The Current Test."""
+    yield re.sub(r"[^\w.-]", "_", request.node.nodeid)
 
 
 @fixture
-def filepath(tmp_path):
+def filepath(basedir, nodename):
     """Return Filepath In Temporary Directory."""
-    yield tmp_path / "file.txt"
+    filepath = basedir / f"{nodename}.txt"
+    yield filepath
+    try:
+        filepath.unlink()
+    except FileNotFoundError:
+        pass
 
 
 @fixture
-def subfilepath(filepath):
+def subfilepath(basedir, nodename):
     """File Within not existing subdirectory."""
-    yield filepath.parent / "sub" / "file.txt"
+    subdir = basedir / nodename
+    yield subdir / "file.txt"
+    shutil.rmtree(subdir, ignore_errors=True)
+
+
+@fixture(scope="session")
+def world_template(basedir):
+    """File Written Once With ``WORLD``."""
+    filepath = basedir / "world.txt"
+    write_file(filepath, WORLD)
+    yield filepath
+
+
+@fixture
+def world_file(world_template, filepath):
+    """Copy Of ``world_template`` At ``filepath``."""
+    shutil.copy2(world_template, filepath)
+    yield filepath
 
 
 def test_attrs(filepath):
@@ -66,90 +127,109 @@ def test_attrs(filepath):
         # assert file.path == filepath
         assert not file.mkdir
         assert file.existing is Existing.KEEP_TIMESTAMP
-        assert file.state == State.OPEN
+        assert file.state is _OPEN
 
 
-def test_no_update(filepath):
-    """Unchanged content shall not modify the timestamp."""
+def test_create(filepath):
+    """The first write shall create the file without any diff."""
     changes = []
 
     def diffout(item):
         changes.append(item)
 
-    # First Write
-    with open_(filepath, diffout=diffout) as file:
-        file.write(WORLD)
-    mtime = filepath.stat().st_mtime
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
+    file = write_file(filepath, WORLD, diffout=diffout)
+    check(file, _CREATED, filepath, WORLD_B)
     assert not changes
 
-    # Successive Writes
-    for _ in range(3):
-        time.sleep(SLEEP)
 
-        with open_(filepath, diffout=diffout) as file:
-            file.write(WORLD)
-        assert cmp_mtime(mtime, filepath.stat().st_mtime)
-        assert filepath.read_text() == WORLD
-        assert file.state == State.IDENTICAL
+def test_no_update(world_file):
+    """Unchanged content shall not modify the timestamp."""
+    changes = []
+
+    def diffout(item):
+        changes.append(item)
+
+    mtime = age_file(world_file)
+
+    for _ in range(3):
+        file = write_file(world_file, WORLD, diffout=diffout)
+        assert cmp_mtime(mtime, world_file.stat().st_mtime)
+        check(file, _IDENTICAL, world_file, WORLD_B)
         assert not changes
 
 
-def test_update(filepath):
+def test_update(world_file):
     """Every content change has to trigger a file update."""
+    filepath = world_file
     changes = []
 
     def diffout(item):
         changes.append(item)
 
-    # First Write
-    with open_(filepath, diffout=diffout) as file:
-        file.write(WORLD)
-    mtime = filepath.stat().st_mtime
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
-    assert not changes
-
-    time.sleep(SLEEP)
+    mtime = age_file(filepath)
 
     # Second Write
-    with open_(filepath, diffout=diffout) as file:
-        file.write(MARS)
+    file = write_file(filepath, MARS, diffout=diffout)
     assert not cmp_mtime(mtime, filepath.stat().st_mtime)
-    assert filepath.read_text() == MARS
-    assert file.state == State.UPDATED
+    check(file, _UPDATED, filepath, MARS_B)
     assert changes == ["--- \n+++ \n@@ -1,2 +1,2 @@\n \n-Hello World.\n+Hello Mars.\n"]
 
-    time.sleep(SLEEP)
+    mtime = age_file(filepath)
     changes.clear()
 
     # Third Write
-    with open_(filepath, diffout=diffout) as file:
-        file.write(WORLD)
+    file = write_file(filepath, WORLD, diffout=diffout)
     assert not cmp_mtime(mtime, filepath.stat().st_mtime)
-    assert filepath.read_text() == WORLD
-    assert file.state == State.UPDATED
+    check(file, _UPDATED, filepath, WORLD_B)
     assert changes == ["--- \n+++ \n@@ -1,2 +1,2 @@\n \n-Hello Mars.\n+Hello World.\n"]
 
 
 def test_update_singleline(filepath):
     """Content without newline and fast."""
-    with open_(filepath) as file:
-        file.write("foo")
-    assert file.state == State.CREATED
-    assert filepath.read_text() == "foo"
+    file = write_file(filepath, "foo")
+    check(file, _CREATED, filepath, b"foo")
 
-    with open_(filepath) as file:
-        file.write("foo")
-    assert file.state == State.IDENTICAL
-    assert filepath.read_text() == "foo"
+    file = write_file(filepath, "foo")
+    check(file, _IDENTICAL, filepath, b"foo")
 
-    with open_(filepath) as file:
-        file.write("barz")
-        file.flush()
-    assert file.state == State.UPDATED
-    assert filepath.read_text() == "barz"
+    file = write_file(filepath, "barz")
+    check(file, _UPDATED, filepath, b"barz")
+
+
+def test_update_same_size(filepath):
+    """Content change without size change."""
+    changes = []
+
+    def diffout(item):
+        changes.append(item)
+
+    write_file(filepath, "foo\n")
+
+    file = write_file(filepath, "bar\n", diffout=diffout)
+    check(file, _UPDATED, filepath, "bar\n".replace("\n", os.linesep).encode())
+    assert changes == ["--- \n+++ \n@@ -1 +1 @@\n-foo\n+bar\n"]
+
+
+def test_update_large(filepath):
+    """Large content (256 KiB), differing at the very end only."""
+    changes = []
+
+    def diffout(item):
+        changes.append(item)
+
+    head = "x" * 63 + "\n"
+    count = 256 * 1024 // len(head)
+    write_file(filepath, head * count + "foo\n")
+
+    file = write_file(filepath, head * count + "foo\n", diffout=diffout)
+    assert file.state is _IDENTICAL
+    assert not changes
+
+    file = write_file(filepath, head * count + "bar\n", diffout=diffout)
+    assert file.state is _UPDATED
+    assert read_all(filepath).endswith(f"{head}bar\n".replace("\n", os.linesep).encode())
+    assert len(changes) == 1
+    assert changes[0].endswith(f" {head}-foo\n+bar\n")
 
 
 class MyException(Exception):
@@ -157,20 +237,14 @@ class MyException(Exception):
 
 
 @mark.parametrize("existing", [Existing.KEEP_TIMESTAMP, Existing.KEEP])
-def test_exception(filepath, existing):
+def test_exception(world_file, existing):
     """An incomplete file caused by an exception, has to be ignored."""
+    filepath = world_file
     state = {
-        Existing.KEEP_TIMESTAMP: State.FAILED,
-        Existing.KEEP: State.EXISTING,
+        Existing.KEEP_TIMESTAMP: _FAILED,
+        Existing.KEEP: _EXISTING,
     }[existing]
-    # First Write
-    with open_(filepath) as file:
-        file.write(WORLD)
-    mtime = filepath.stat().st_mtime
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
-
-    time.sleep(SLEEP)
+    mtime = age_file(filepath)
 
     # Second Write
     try:
@@ -179,24 +253,22 @@ def test_exception(filepath, existing):
             raise MyException()
     except MyException:
         pass
-    assert filepath.read_text() == WORLD
     assert cmp_mtime(mtime, filepath.stat().st_mtime)
-    assert file.state == state
+    check(file, state, filepath, WORLD_B)
 
 
 def test_close(filepath):
     """Test OutputFile with explicit close()."""
     file = open_(filepath)
     file.write(WORLD)
-    assert file.state == State.OPEN
+    assert file.state is _OPEN
     assert not file.closed
     file.close()
     assert file.closed
-    assert file.state == State.CREATED
+    assert file.state is _CREATED
     file.close()
     assert file.closed
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
+    check(file, _CREATED, filepath, WORLD_B)
 
 
 def test_write_closed(filepath):
@@ -204,92 +276,76 @@ def test_write_closed(filepath):
     file = open_(filepath)
     file.write(WORLD)
     file.close()
-    assert file.state == State.CREATED
+    assert file.state is _CREATED
 
-    match = re.escape("I/O Error. Write on closed file.")
-    with raises(ValueError, match=match):
+    with raises(ValueError, match=_CLOSED_MSG):
         file.write(WORLD)
-    assert file.state == State.CREATED
+    assert file.state is _CREATED
 
 
 def test_mkdir(subfilepath):
     """Create output directory."""
+    parent = subfilepath.parent
 
-    match = re.escape(f"Output directory '{subfilepath.parent}' does not exists.")
+    match = re.escape(_MKDIR_FMT.format(parent))
     with raises(FileNotFoundError, match=match):
         open_(subfilepath)
 
-    with open_(subfilepath, mkdir=True) as file:
-        file.write(WORLD)
-    assert subfilepath.read_text() == WORLD
+    write_file(subfilepath, WORLD, mkdir=True)
+    assert parent.is_dir()
+    assert read_all(subfilepath) == WORLD_B
 
 
 def test_existing_error(filepath):
     """existing=Existing.ERROR."""
     # First
-    with open_(filepath, existing=Existing.ERROR) as file:
-        file.write(WORLD)
-    assert file.state == State.CREATED
+    file = write_file(filepath, WORLD, existing=Existing.ERROR)
+    assert file.state is _CREATED
 
     # Failing second
     with raises(FileExistsError):
-        with open_(filepath, existing=Existing.ERROR) as file:
-            file.write(MARS)
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
+        write_file(filepath, MARS, existing=Existing.ERROR)
+    check(file, _CREATED, filepath, WORLD_B)
 
 
 def test_existing_keep(filepath):
     """existing=Existing.KEEP."""
     # First
-    with open_(filepath, existing=Existing.KEEP) as file:
-        file.write(WORLD)
-    assert file.state == State.CREATED
+    file = write_file(filepath, WORLD, existing=Existing.KEEP)
+    assert file.state is _CREATED
 
     # Second, ignored.
-    with open_(filepath, existing=Existing.KEEP) as file:
-        file.write(MARS)
-    assert filepath.read_text() == WORLD
-    assert file.state == State.EXISTING
+    file = write_file(filepath, MARS, existing=Existing.KEEP)
+    check(file, _EXISTING, filepath, WORLD_B)
 
 
 def test_existing_overwrite(filepath):
     """existing=Existing.OVERWRITE."""
     # First Write
-    with open_(filepath, existing=Existing.OVERWRITE) as file:
-        file.write(WORLD)
-    mtime = filepath.stat().st_mtime
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
+    file = write_file(filepath, WORLD, existing=Existing.OVERWRITE)
+    check(file, _CREATED, filepath, WORLD_B)
 
-    time.sleep(SLEEP)
+    mtime = age_file(filepath)
 
     # Second Write
-    with open_(filepath, existing=Existing.OVERWRITE) as file:
-        file.write(WORLD)
+    file = write_file(filepath, WORLD, existing=Existing.OVERWRITE)
     assert not cmp_mtime(mtime, filepath.stat().st_mtime)
-    assert filepath.read_text() == WORLD
-    assert file.state == State.OVERWRITTEN
+    check(file, _OVERWRITTEN, filepath, WORLD_B)
 
 
 def test_existing_overwrite_str(filepath):
     """existing='overwrite'."""
-    # First Write
     with chdir(filepath.parent):
-        with open_(filepath.name, existing="overwrite") as file:
-            file.write(WORLD)
-    mtime = filepath.stat().st_mtime
-    assert filepath.read_text() == WORLD
-    assert file.state == State.CREATED
+        # First Write
+        file = write_file(filepath.name, WORLD, existing="overwrite")
+        check(file, _CREATED, filepath, WORLD_B)
 
-    time.sleep(SLEEP)
+        mtime = age_file(filepath)
 
-    # Second Write
-    with open_(filepath, existing=Existing.OVERWRITE) as file:
-        file.write(WORLD)
-    assert not cmp_mtime(mtime, filepath.stat().st_mtime)
-    assert filepath.read_text() == WORLD
-    assert file.state == State.OVERWRITTEN
+        # Second Write
+        file = write_file(filepath.name, WORLD, existing="overwrite")
+        assert not cmp_mtime(mtime, filepath.stat().st_mtime)
+        check(file, _OVERWRITTEN, filepath, WORLD_B)
 
 
 def test_flush(filepath):
@@ -297,6 +353,8 @@ def test_flush(filepath):
     with open_(filepath) as file:
         file.write(WORLD)
         file.flush()
-    assert filepath.read_text() == WORLD
+    assert read_all(filepath) == WORLD_B
+    # no-op on closed file
+    assert file.closed
     file.flush()
-    assert filepath.read_text() == WORLD
+    assert read_all(filepath) == WORLD_B
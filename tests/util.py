@@ -35,3 +35,26 @@ def chdir(path):
         yield
     finally:
         os.chdir(curdir)
+
+
+def age_file(path, secs=1.0):
+    """Move Modification Time of ``path`` ``secs`` seconds to the past and return it."""
+    stat = os.stat(path)
+    mtime = stat.st_mtime - secs
+    os.utime(path, (stat.st_atime, mtime))
+    return mtime
+
+
+def read_all(path):
+    """Return Raw Content of ``path``."""
+    chunks = []
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)